@@ -1,30 +1,22 @@
-from typing import Tuple
-
-class CoffeeOrder:
-    def __init__(
-        self,
-        base: str,
-        size: str,
-        milk: str = "none",
-        syrups: Tuple[str, ...] = (),
-        sugar: int = 0,
-        iced: bool = False,
-        price: float = 0.0,
-        description: str = ""
-    ):
-        self.base = base
-        self.size = size
-        self.milk = milk
-        self.syrups = syrups
-        self.sugar = sugar
-        self.iced = iced
-        self.price = price
-        self.description = description
+import sys
+from contextlib import contextmanager
+from functools import lru_cache
+from itertools import product
+from typing import Iterable, Iterator, NamedTuple, Tuple
+
+class CoffeeOrder(NamedTuple):
+    base: str
+    size: str
+    milk: str = "none"
+    syrups: Tuple[str, ...] = ()
+    sugar: int = 0
+    iced: bool = False
+    price: float = 0.0
+    description: str = ""
     
     def __str__(self) -> str:
-        if self.description:
-            return self.description
-        return f"Coffee order - {self.price:.2f}"
+        # Заказы от билдера всегда имеют описание; форматирование цены только для пустого
+        return self.description or f"Coffee order - {self.price:.2f}"
 
 
 class CoffeeOrderBuilder:
@@ -33,6 +25,7 @@ class CoffeeOrderBuilder:
     
     Правила:
     - base и size обязательны для build()
+    - base, size и milk проверяются при установке (иначе ValueError)
     - sugar: 0-5 чайных ложек
     - максимум 4 сиропа
     - дубликаты сиропов игнорируются
@@ -43,7 +36,14 @@ class CoffeeOrderBuilder:
     - Молоко: whole/skim=30, oat=60, soy=50, none=0
     - Сироп: 40 за каждый
     - Лед: 0.2 при iced=True
+    
+    Переиспользование: acquire()/release() или with scoped() берут билдер из пула.
     """
+    __slots__ = (
+        "base", "size", "milk", "_syrups", "_n_syrups", "_syrup_set", "sugar", "iced",
+        "_pooled"
+    )
+    
     # Базовые цены
     BASE_PRICES = {
         "espresso": 200.0,
@@ -68,105 +68,179 @@ class CoffeeOrderBuilder:
         "soy": 50.0
     }
     
+    # Допустимые значения опций -> канонический (интернированный) ключ таблицы цен
+    _BASES = {base: base for base in BASE_PRICES}
+    _SIZES = {size: size for size in SIZE_MULTIPLIERS}
+    _MILKS = {milk: milk for milk in MILK_PRICES}
+    
     # Цена за сироп
     SYRUP_PRICE = 40.0
     
     # Цена за лед
     ICED_PRICE = 0.2
     
+    # Цены в копейках (x100) для точной целочисленной арифметики;
+    # округление один раз после умножения не зависит от числа знаков в константах
+    _BASE_SIZE_CENTS = {
+        (base, size): round(base_price * multiplier * 100)
+        for (base, base_price), (size, multiplier)
+        in product(BASE_PRICES.items(), SIZE_MULTIPLIERS.items())
+    }
+    _MILK_CENTS = {milk: round(price * 100) for milk, price in MILK_PRICES.items()}
+    _SYRUP_CENTS = round(SYRUP_PRICE * 100)
+    _ICED_CENTS = round(ICED_PRICE * 100)
+    
     # Лимиты
     MAX_SUGAR = 5
     MAX_SYRUPS = 4
     
+    # Пул свободных билдеров для acquire()/release()
+    _POOL: list["CoffeeOrderBuilder"] = []
+    MAX_POOL_SIZE = 16
+    
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        # У каждого подкласса свой пул, чтобы acquire() возвращал экземпляр cls
+        cls._POOL = []
+    
     def __init__(self):
         self.base: str = ""
         self.size: str = ""
         self.milk: str = "none"
-        self.syrups: list[str] = []
+        # Сиропы хранятся в заранее выделенных слотах, занятых _n_syrups
+        self._syrups: list[str | None] = [None] * self.MAX_SYRUPS
+        self._n_syrups: int = 0
+        self._syrup_set: set[str] = set()
         self.sugar: int = 0
         self.iced: bool = False
+        # True, пока билдер лежит в пуле (защита от двойного release)
+        self._pooled: bool = False
     
     def set_base(self, base: str) -> "CoffeeOrderBuilder":
-        self.base = base
+        canonical = self._BASES.get(base)
+        if canonical is None:
+            raise ValueError(f"Unknown base: {base}")
+        self.base = canonical
         return self
     
     def set_size(self, size: str) -> "CoffeeOrderBuilder":
-        self.size = size
+        canonical = self._SIZES.get(size)
+        if canonical is None:
+            raise ValueError(f"Unknown size: {size}")
+        self.size = canonical
         return self
     
     def set_milk(self, milk: str) -> "CoffeeOrderBuilder":
-        self.milk = milk
+        canonical = self._MILKS.get(milk)
+        if canonical is None:
+            raise ValueError(f"Unknown milk: {milk}")
+        self.milk = canonical
         return self
     
     def add_syrup(self, name: str) -> "CoffeeOrderBuilder":
-        if name not in self.syrups and len(self.syrups) < self.MAX_SYRUPS:
-            self.syrups.append(name)
+        return self.add_syrups(name)
+    
+    def add_syrups(self, *names: str) -> "CoffeeOrderBuilder":
+        syrup_set = self._syrup_set
+        syrups = self._syrups
+        n_syrups = self._n_syrups
+        max_syrups = self.MAX_SYRUPS
+        for name in names:
+            if name not in syrup_set and n_syrups < max_syrups:
+                syrup_set.add(name)
+                syrups[n_syrups] = name
+                n_syrups += 1
+        self._n_syrups = n_syrups
         return self
     
     def set_sugar(self, teaspoons: int) -> "CoffeeOrderBuilder":
-        if teaspoons < 0 or teaspoons > self.MAX_SUGAR:
+        if not 0 <= teaspoons <= self.MAX_SUGAR:
             raise ValueError(f"Sugar must be between 0 and {self.MAX_SUGAR}")
         self.sugar = teaspoons
         return self
     
     def set_iced(self, iced: bool = True) -> "CoffeeOrderBuilder":
-        self.iced = iced
+        # Храним строго bool: цена льда считается как iced * _ICED_CENTS
+        self.iced = bool(iced)
         return self
     
     def clear_extras(self) -> "CoffeeOrderBuilder":
         self.milk = "none"
-        self.syrups = []
+        self._n_syrups = 0
+        self._syrup_set.clear()
         self.sugar = 0
         self.iced = False
         return self
     
-    def _calculate_price(self) -> float:
-        if self.base not in self.BASE_PRICES:
-            return 0.0
-        
-        base_price = self.BASE_PRICES[self.base]
-        size_multiplier = self.SIZE_MULTIPLIERS.get(self.size, 1.0)
-        
-        price = base_price * size_multiplier
-        
-        # Добавляем молоко
-        milk_price = self.MILK_PRICES.get(self.milk, 0.0)
-        price += milk_price
-        
-        # Добавляем сиропы
-        price += len(self.syrups) * self.SYRUP_PRICE
-        
-        # Добавляем лед
-        if self.iced:
-            price += self.ICED_PRICE
-        
-        return price
-    
-    def _build_description(self) -> str:  
-        parts = []
-        
-        # Размер и база
-        if self.size and self.base:
-            parts.append(f"{self.size} {self.base}")
-        
-        # Молоко (если не none)
-        if self.milk and self.milk != "none":
-            parts.append(f"with {self.milk} milk")
-        
-        # Сиропы
-        if self.syrups:
-            syrup_str = ", ".join(self.syrups)
-            parts.append(f"+{syrup_str}")
-        
-        # Лед
-        if self.iced:
-            parts.append("(iced)")
-        
-        # Сахар (если больше 0)
-        if self.sugar > 0:
-            parts.append(f"{self.sugar} tsp sugar")
-        
-        return " ".join(parts)
+    def reset(self) -> "CoffeeOrderBuilder":
+        self.base = ""
+        self.size = ""
+        return self.clear_extras()
+    
+    @classmethod
+    def acquire(cls) -> "CoffeeOrderBuilder":
+        """Берет билдер из пула (или создает новый), состояние сброшено."""
+        # pop() без предварительной проверки: проверка и pop вместе не атомарны
+        try:
+            builder = cls._POOL.pop()
+        except IndexError:
+            return cls()
+        builder._pooled = False
+        # Сбрасываем и здесь: ссылка, оставшаяся после release(), могла изменить билдер
+        return builder.reset()
+    
+    def release(self) -> None:
+        """Сбрасывает билдер и возвращает его в пул; повторный release игнорируется."""
+        if self._pooled:
+            return
+        self.reset()
+        pool = self._POOL
+        if len(pool) < self.MAX_POOL_SIZE:
+            self._pooled = True
+            pool.append(self)
+    
+    @classmethod
+    @contextmanager
+    def scoped(cls) -> Iterator["CoffeeOrderBuilder"]:
+        """Билдер из пула на время блока with."""
+        builder = cls.acquire()
+        try:
+            yield builder
+        finally:
+            builder.release()
+    
+    @classmethod
+    def price_bulk(
+        cls,
+        bases: Iterable[str],
+        sizes: Iterable[str],
+        milks: Iterable[str],
+        n_syrups: Iterable[int],
+        iced: Iterable[bool]
+    ) -> list[float]:
+        """Цены для набора заказов без создания билдеров (например, для меню)."""
+        base_size_cents = cls._BASE_SIZE_CENTS
+        milk_cents = cls._MILK_CENTS
+        syrup_cents = cls._SYRUP_CENTS
+        iced_cents = cls._ICED_CENTS
+        max_syrups = cls.MAX_SYRUPS
+        prices = []
+        # strict=True: колонки разной длины — ошибка, а не потерянные строки
+        for b, s, m, n, i in zip(bases, sizes, milks, n_syrups, iced, strict=True):
+            if isinstance(n, bool) or not isinstance(n, int) or not 0 <= n <= max_syrups:
+                raise ValueError(f"Syrups must be an int between 0 and {max_syrups}")
+            try:
+                cents = base_size_cents[(b, s)]
+            except KeyError:
+                if b not in cls._BASES:
+                    raise ValueError(f"Unknown base: {b}") from None
+                raise ValueError(f"Unknown size: {s}") from None
+            try:
+                cents += milk_cents[m]
+            except KeyError:
+                raise ValueError(f"Unknown milk: {m}") from None
+            prices.append((cents + n * syrup_cents + bool(i) * iced_cents) / 100)
+        return prices
     
     def build(self) -> CoffeeOrder:
         if not self.base:
@@ -174,14 +248,16 @@ class CoffeeOrderBuilder:
         if not self.size:
             raise ValueError("Size is required")
         
-        price = self._calculate_price()
-        description = self._build_description()
+        syrups = tuple(self._syrups[:self._n_syrups])
+        price, description = _compute_order(
+            self.base, self.size, self.milk, syrups, self.sugar, self.iced
+        )
         
         return CoffeeOrder(
             base=self.base,
             size=self.size,
             milk=self.milk,
-            syrups=tuple(self.syrups),
+            syrups=syrups,
             sugar=self.sugar,
             iced=self.iced,
             price=price,
@@ -189,6 +265,54 @@ class CoffeeOrderBuilder:
         )
 
 
+@lru_cache(maxsize=1024, typed=True)
+def _compute_order(
+    base: str,
+    size: str,
+    milk: str,
+    syrups: Tuple[str, ...],
+    sugar: int,
+    iced: bool,
+    # Константы связаны как локальные переменные, не передавать
+    _base_size_cents: dict[tuple[str, str], int] = CoffeeOrderBuilder._BASE_SIZE_CENTS,
+    _milk_cents: dict[str, int] = CoffeeOrderBuilder._MILK_CENTS,
+    _syrup_cents: int = CoffeeOrderBuilder._SYRUP_CENTS,
+    _iced_cents: int = CoffeeOrderBuilder._ICED_CENTS
+) -> Tuple[float, str]:
+    """Считает цену и описание заказа за один проход по опциям.
+
+    Результат кешируется для повторяющихся заказов, описания интернируются.
+    """
+    # Опции уже проверены сеттерами билдера
+    # Цена считается в копейках и переводится в рубли в конце
+    cents = _base_size_cents[(base, size)]
+    
+    # Размер и база (build() гарантирует, что оба заданы)
+    description = f"{size} {base}"
+    
+    # Молоко (если не none)
+    cents += _milk_cents[milk]
+    if milk != "none":
+        description = f"{description} with {milk} milk"
+    
+    # Сиропы
+    cents += len(syrups) * _syrup_cents
+    if syrups:
+        description = f"{description} +{', '.join(syrups)}"
+    
+    # Лед (bool как 0/1, без ветвления в цене)
+    cents += iced * _iced_cents
+    if iced:
+        description = f"{description} (iced)"
+    
+    # Сахар (если больше 0)
+    if sugar > 0:
+        description = f"{description} {sugar} tsp sugar"
+    
+    # Одинаковые описания разделяют одну строку в памяти
+    return cents / 100, sys.intern(description)
+
+
 # ==================== ТЕСТЫ ====================
 
 def test_basic_order():
@@ -260,6 +384,49 @@ def test_validation_sugar_limit():
         print("Валидация лимита сахара: тест пройден")
 
 
+def test_validation_unknown_options():
+    builder = CoffeeOrderBuilder()
+    
+    for setter, value in (
+        (builder.set_base, "mocha"),
+        (builder.set_size, "huge"),
+        (builder.set_milk, "almond"),
+    ):
+        try:
+            setter(value)
+            assert False, "Должен быть ValueError"
+        except ValueError as e:
+            assert value in str(e)
+    print("Валидация неизвестных опций: тест пройден")
+
+
+def test_sugar_equal_values():
+    # Равные, но разнотипные значения не должны делить запись кеша
+    order_float = CoffeeOrderBuilder().set_base("latte").set_size("small").set_sugar(2.0).build()
+    order_int = CoffeeOrderBuilder().set_base("latte").set_size("small").set_sugar(2).build()
+    order_bool = CoffeeOrderBuilder().set_base("latte").set_size("small").set_sugar(True).build()
+    order_one = CoffeeOrderBuilder().set_base("latte").set_size("small").set_sugar(1).build()
+    
+    assert order_float.description == "small latte 2.0 tsp sugar"
+    assert order_int.description == "small latte 2 tsp sugar"
+    assert order_bool.description == "small latte True tsp sugar"
+    assert order_one.description == "small latte 1 tsp sugar"
+    print("Равные значения сахара: тест пройден")
+
+
+def test_str_subclass_options():
+    from enum import Enum
+    
+    class Base(str, Enum):
+        LATTE = "latte"
+    
+    order = CoffeeOrderBuilder().set_base(Base.LATTE).set_size("small").build()
+    
+    assert type(order.base) is str and order.base == "latte"
+    assert order.description == "small latte"
+    print("Опции-наследники str: тест пройден")
+
+
 def test_syrup_duplicates():
     builder = CoffeeOrderBuilder()
     order1 = builder.set_base("latte").set_size("medium").add_syrup("vanilla").add_syrup("vanilla").build()
@@ -284,6 +451,9 @@ def test_iced_price():
     
     assert price_with_ice > price_without_ice, "Лед должен добавлять доплату"
     assert abs(price_with_ice - price_without_ice - CoffeeOrderBuilder.ICED_PRICE) < 0.01, "Доплата за лед должна быть 0.2"
+    order_truthy = CoffeeOrderBuilder().set_base("americano").set_size("small").set_iced(2).build()
+    assert order_truthy.iced is True, "iced должен храниться как bool"
+    assert order_truthy.price == price_with_ice, "Любое истинное значение дает одну доплату"
     print("Доплата за лед: тест пройден")
 
 
@@ -300,6 +470,51 @@ def test_max_syrups():
     print("Лимит сиропов: тест пройден")
 
 
+def test_add_syrups():
+    builder = CoffeeOrderBuilder().set_base("latte").set_size("medium")
+    builder.add_syrups("vanilla", "caramel", "vanilla", "hazelnut", "chocolate", "cinnamon")
+    order = builder.build()
+    
+    assert order.syrups == ("vanilla", "caramel", "hazelnut", "chocolate"), "Порядок, дубликаты и лимит"
+    print("Пакетное добавление сиропов: тест пройден")
+
+
+def test_price_bulk():
+    order1 = CoffeeOrderBuilder().set_base("latte").set_size("medium").set_milk("oat").add_syrups("vanilla", "caramel").set_iced().build()
+    order2 = CoffeeOrderBuilder().set_base("espresso").set_size("small").build()
+    
+    prices = CoffeeOrderBuilder.price_bulk(
+        ["latte", "espresso"], ["medium", "small"], ["oat", "none"], [2, 0], [True, False]
+    )
+    assert prices == [order1.price, order2.price], "Цены должны совпадать с build()"
+    
+    for args in (
+        (["mocha"], ["small"], ["none"], [0], [False]),
+        (["latte"], ["small"], ["almond"], [0], [False]),
+        (["latte"], ["small"], ["none"], [CoffeeOrderBuilder.MAX_SYRUPS + 1], [False]),
+        (["latte"], ["small"], ["none"], [1.5], [False]),
+        (["latte"], ["small"], ["none"], [True], [False]),
+        (["latte", "latte"], ["small"], ["none", "none"], [0, 0], [False, False]),
+    ):
+        try:
+            CoffeeOrderBuilder.price_bulk(*args)
+            assert False, "Должен быть ValueError"
+        except ValueError:
+            pass
+    
+    for args, field in (
+        ((["mocha"], ["small"], ["none"], [0], [False]), "base: mocha"),
+        ((["latte"], ["huge"], ["none"], [0], [False]), "size: huge"),
+        ((["latte"], ["small"], ["almond"], [0], [False]), "milk: almond"),
+    ):
+        try:
+            CoffeeOrderBuilder.price_bulk(*args)
+            assert False, "Должен быть ValueError"
+        except ValueError as e:
+            assert field in str(e), "Ошибка должна называть неверное поле"
+    print("Пакетный расчет цен: тест пройден")
+
+
 def test_description_format():
     builder = CoffeeOrderBuilder()
     order = builder.set_base("cappuccino").set_size("large").set_milk("soy").add_syrup("vanilla").set_sugar(2).set_iced(True).build()
@@ -338,6 +553,66 @@ def test_clear_extras():
     print("clear_extras: тест пройден")
 
 
+def test_builder_pool():
+    CoffeeOrderBuilder._POOL.clear()
+    
+    with CoffeeOrderBuilder.scoped() as builder:
+        order = builder.set_base("latte").set_size("large").set_milk("oat").add_syrup("vanilla").build()
+    
+    with CoffeeOrderBuilder.scoped() as reused:
+        assert reused is builder, "Билдер должен браться из пула"
+        try:
+            reused.build()
+            assert False, "Должен быть ValueError"
+        except ValueError:
+            pass
+        order2 = reused.set_base("espresso").set_size("small").build()
+    
+    assert order.syrups == ("vanilla",), "order не должен измениться"
+    assert order2.milk == "none" and order2.syrups == (), "Состояние должно быть сброшено"
+    
+    # Двойной release не должен класть билдер в пул дважды
+    with CoffeeOrderBuilder.scoped() as released_twice:
+        released_twice.release()
+    first = CoffeeOrderBuilder.acquire()
+    second = CoffeeOrderBuilder.acquire()
+    assert first is not second, "Один билдер не должен выдаваться дважды"
+    
+    # Изменения через ссылку, оставшуюся после release(), не попадают к следующему владельцу
+    CoffeeOrderBuilder._POOL.clear()
+    stale = CoffeeOrderBuilder.acquire()
+    stale.release()
+    stale.set_base("latte").set_milk("oat")
+    fresh = CoffeeOrderBuilder.acquire()
+    assert fresh is stale and fresh.base == "" and fresh.milk == "none", "acquire() должен сбрасывать состояние"
+    
+    # У подкласса свой пул
+    class SubBuilder(CoffeeOrderBuilder):
+        __slots__ = ()
+    
+    fresh.release()
+    assert type(SubBuilder.acquire()) is SubBuilder, "Подкласс не должен получать билдер базового класса"
+    print("Пул билдеров: тест пройден")
+
+
+def test_str():
+    order = CoffeeOrderBuilder().set_base("espresso").set_size("small").build()
+    
+    assert str(order) == order.description == "small espresso"
+    assert str(CoffeeOrder(base="espresso", size="small", price=200.0)) == "Coffee order - 200.00"
+    print("Строковое представление: тест пройден")
+
+
+def test_order_immutable():
+    order = CoffeeOrderBuilder().set_base("latte").set_size("small").build()
+    
+    try:
+        order.price = 0.0
+        assert False, "Должен быть AttributeError"
+    except AttributeError:
+        print("Неизменяемость заказа: тест пройден")
+
+
 if __name__ == "__main__":
     print("Запуск тестов...\n")
     
@@ -346,12 +621,20 @@ if __name__ == "__main__":
     test_validation_missing_base()
     test_validation_missing_size()
     test_validation_sugar_limit()
+    test_validation_unknown_options()
+    test_sugar_equal_values()
+    test_str_subclass_options()
     test_syrup_duplicates()
     test_iced_price()
     test_max_syrups()
+    test_add_syrups()
+    test_price_bulk()
     test_description_format()
     test_default_values()
     test_clear_extras()
+    test_builder_pool()
+    test_str()
+    test_order_immutable()
     
     print("\n🎉 Все тесты успешно пройдены!\n")
     
\ No newline at end of file